@@ -1,9 +1,14 @@
+import os
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.colors as pc
+import plotly.graph_objects as go
 import re
 
+from uis_charts import (CHART_MARGIN, CHART_TEMPLATE, TREND_OVERLAYS, add_trend_overlays, apply_time_axis,
+                        build_opri_cross_country_chart, build_sdg4_line_chart, compact_figure)
+from uis_data import COUNTRY_NAMES, OPRI_FILES, SDG4_FILES, compute_timeseries_analytics, dataset_version
+from uis_loading import start_all_dataset_loads, start_dataset_load, wait_for_dataset
+
 # -----------------------------------------------------------------------------
 # PAGE CONFIGURATION & CUSTOM CSS (shared by both dashboards)
 # -----------------------------------------------------------------------------
@@ -68,28 +73,74 @@ st.sidebar.markdown(
 
 
 # =============================================================================
-# SDG4 DASHBOARD FUNCTIONS 
+# CHART PAYLOAD HELPERS (shared by both dashboards)
+# =============================================================================
+# Set UIS_MEASURE_PAYLOAD=1 to show the bytes sent to the browser per chart and per view
+MEASURE_PAYLOAD = os.environ.get("UIS_MEASURE_PAYLOAD") == "1"
+payload_log = []
+
+def _baseline_size(fig, rangeslider=False):
+    # The figure as the dashboards sent it before the payload optimisations: full
+    # plotly_white template, uncompacted int64/float64 arrays and, for the secondary
+    # cross-country charts, the range slider they used to carry
+    baseline = go.Figure(fig)
+    baseline.update_layout(template="plotly_white")
+    if rangeslider:
+        apply_time_axis(baseline)
+    return len(baseline.to_json())
+
+def emit_chart(fig, baseline_rangeslider=False, **kwargs):
+    if MEASURE_PAYLOAD:
+        before = _baseline_size(fig, baseline_rangeslider)
+    compact_figure(fig)
+    if MEASURE_PAYLOAD:
+        after = len(fig.to_json())
+        payload_log.append((before, after))
+        st.caption(f"Chart payload: {after:,} bytes sent ({before:,} before the payload optimisations)")
+    st.plotly_chart(fig, use_container_width=True, **kwargs)
+
+def record_deferred_chart(build, baseline_rangeslider=False):
+    # A chart behind a closed toggle sends nothing now, but the baseline always built
+    # and sent it, so it still counts towards the view's "before"
+    if MEASURE_PAYLOAD:
+        payload_log.append((_baseline_size(build(), baseline_rangeslider), 0))
+
+def show_payload_summary():
+    if MEASURE_PAYLOAD and payload_log:
+        before = sum(b for b, _ in payload_log)
+        after = sum(a for _, a in payload_log)
+        sent = sum(1 for _, a in payload_log if a)
+        st.sidebar.caption(f"View payload: {after:,} bytes in {sent} chart(s) ({before:,} in "
+                           f"{len(payload_log)} chart(s) before the payload optimisations)")
+
+
+# =============================================================================
+# TIME-SERIES ANALYTICS (shared by both dashboards)
 # =============================================================================
 @st.cache_data
-def load_data_sdg4():
-    data = pd.read_csv('UNESCO_edu_data.csv')
-    metadata = pd.read_csv('SDG_METADATA.csv')
-    data.drop('indicator_desc', axis=1, inplace=True)
-    data.rename(columns={'indicator_id': 'INDICATOR_ID'}, inplace=True)
-    data['INDICATOR_ID'] = data['INDICATOR_ID'].str.upper().str.strip()
-    label_data = pd.merge(data, metadata, on="INDICATOR_ID", how="left")
-    return label_data
+def load_timeseries_analytics(dataset, version):
+    # `version` only keys the cache; pass dataset_version() of the dataset's source files
+    future, _ = start_dataset_load(dataset, version)
+    return compute_timeseries_analytics(future.result(), ['country_id', 'INDICATOR_ID'])
+
+def select_trend_overlays():
+    return st.sidebar.multiselect("Trend Overlays", options=TREND_OVERLAYS, default=[])
 
-sdg4_data = load_data_sdg4()
 
+# =============================================================================
+# SDG4 DASHBOARD FUNCTIONS 
+# =============================================================================
 def create_line_chart_with_selection_sdg4(country_code):
+    sdg4_data = wait_for_dataset("sdg4")
+    if sdg4_data is None:
+        return None
     df = sdg4_data[sdg4_data['country_id'] == country_code]
     unique_indicators = df[['INDICATOR_ID', 'INDICATOR_LABEL_EN']].drop_duplicates().sort_values('INDICATOR_ID')
     indicator_options = unique_indicators['INDICATOR_ID'].tolist()
+    indicator_labels = dict(zip(unique_indicators['INDICATOR_ID'], unique_indicators['INDICATOR_LABEL_EN']))
     
     def format_indicator(ind):
-        label = unique_indicators[unique_indicators['INDICATOR_ID'] == ind]['INDICATOR_LABEL_EN'].iloc[0]
-        return f"{ind} - {label}"
+        return f"{ind} - {indicator_labels[ind]}"
     
     selected_indicators = st.sidebar.multiselect(
         "Select SDG4 Indicator(s) to Display",
@@ -99,68 +150,39 @@ def create_line_chart_with_selection_sdg4(country_code):
     if not selected_indicators:
         st.sidebar.warning("Please select at least one indicator.")
         return None
+    overlays = select_trend_overlays()
 
     df_filtered = df[df['INDICATOR_ID'].isin(selected_indicators)].drop_duplicates()
-    
-    base_colors = pc.qualitative.Plotly
-    indicator_color_map = {ind: base_colors[i % len(base_colors)] 
-                           for i, ind in enumerate(sorted(selected_indicators))}
-    
-    fig = px.line(
-        df_filtered,
-        x='year',
-        y='value',
-        color='INDICATOR_ID',
-        markers=True,
-        custom_data=['INDICATOR_LABEL_EN'],
-        template='plotly_white',
-        labels={'year': 'Year', 'value': 'Value'}
-    )
-    fig.update_traces(
-        hovertemplate='<b>%{customdata[0]}</b><br>Year: %{x}<br>Value: %{y}<extra></extra>'
-    )
-    for trace in fig.data:
-        ind = trace.name
-        if ind in indicator_color_map:
-            trace.line.color = indicator_color_map[ind]
-            trace.line.width = 3
-    fig.update_layout(margin=dict(l=60, r=60, t=40, b=80))
-    fig.update_xaxes(
-        rangeslider_visible=True,
-        rangeselector=dict(
-            buttons=[
-                dict(count=5, label='Last 5 Years', step='year', stepmode='backward'),
-                dict(count=10, label='Last 10 Years', step='year', stepmode='backward'),
-                dict(step='all', label='All Years')
-            ]
-        )
-    )
-    return fig
+    analytics = None
+    if overlays:
+        analytics = load_timeseries_analytics("sdg4", dataset_version(SDG4_FILES))
+        analytics = analytics[(analytics['country_id'] == country_code) & analytics['INDICATOR_ID'].isin(selected_indicators)]
+    return build_sdg4_line_chart(df_filtered, indicator_labels, overlays, analytics)
 
 
 def sdg4_show_nepal():
     st.subheader("Nepal Analysis")
     fig = create_line_chart_with_selection_sdg4('NPL')
     if fig is not None:
-        st.plotly_chart(fig, use_container_width=True)
+        emit_chart(fig)
 
 def sdg4_show_estonia():
     st.subheader("Estonia Analysis")
     fig = create_line_chart_with_selection_sdg4('EST')
     if fig is not None:
-        st.plotly_chart(fig, use_container_width=True)
+        emit_chart(fig)
 
 def sdg4_show_sierra_leone():
     st.subheader("Sierra Leone Analysis")
     fig = create_line_chart_with_selection_sdg4('SLE')
     if fig is not None:
-        st.plotly_chart(fig, use_container_width=True)
+        emit_chart(fig)
 
 def sdg4_show_usa():
     st.subheader("USA Analysis")
     fig = create_line_chart_with_selection_sdg4('USA')
     if fig is not None:
-        st.plotly_chart(fig, use_container_width=True)
+        emit_chart(fig)
 
 def show_sdg4_individual():
     st.title(":green[SDG-4 indicators -> Individual Analysis]")
@@ -201,6 +223,7 @@ def show_sdg4_cross():
         options=list(indicators.keys()),
         format_func=lambda x: f"{x} - {indicators[x]}"
     )
+    overlays = select_trend_overlays()
     st.markdown(
     f"""
     <h4>Displaying cross-country analysis for:- </h4>
@@ -211,6 +234,9 @@ def show_sdg4_cross():
     )
       
     st.markdown("<br><br>", unsafe_allow_html=True)
+    sdg4_data = wait_for_dataset("sdg4")
+    if sdg4_data is None:
+        return
     df = sdg4_data[sdg4_data["INDICATOR_ID"] == selected_indicator].drop_duplicates()
     base_colors = {
         "NPL": "#FF6347",
@@ -224,51 +250,36 @@ def show_sdg4_cross():
         y="value",
         color="country_id",
         markers=True,
-        template="plotly_white",
+        template=CHART_TEMPLATE,
         labels={"year": "Year", "value": "Value", "country_id": "Country"},
         color_discrete_map=base_colors,
         height=700
     )
-    fig_line.update_layout(margin=dict(l=60, r=60, t=40, b=80))
+    fig_line.update_layout(margin=CHART_MARGIN)
     for trace in fig_line.data:
         trace.line.width = 3
-    fig_line.update_xaxes(
-        rangeslider_visible=True,
-        rangeselector=dict(
-            buttons=[
-                dict(count=5, label="Last 5 Years", step="year", stepmode="backward"),
-                dict(count=10, label="Last 10 Years", step="year", stepmode="backward"),
-                dict(step="all", label="All Years")
-            ]
-        )
-    )
-    st.plotly_chart(fig_line, use_container_width=True)
-    with st.expander("Show Area Chart"):
+    if overlays:
+        analytics = load_timeseries_analytics("sdg4", dataset_version(SDG4_FILES))
+        add_trend_overlays(fig_line, analytics[analytics['INDICATOR_ID'] == selected_indicator], 'country_id', overlays)
+    apply_time_axis(fig_line)
+    emit_chart(fig_line)
+
+    def build_area_chart():
         fig_area = px.area(
             df,
             x="year",
             y="value",
             color="country_id",
-            template="plotly_white",
+            template=CHART_TEMPLATE,
             labels={"year": "Year", "value": "Value", "country_id": "Country"},
             color_discrete_map=base_colors,
             height=700
         )
         fig_area.update_traces(opacity=0.75)
-        fig_area.update_layout(margin=dict(l=60, r=60, t=40, b=80))
-        fig_area.update_xaxes(
-            rangeslider_visible=True,
-            rangeselector=dict(
-                buttons=[
-                    dict(count=5, label="Last 5 Years", step="year", stepmode="backward"),
-                    dict(count=10, label="Last 10 Years", step="year", stepmode="backward"),
-                    dict(step="all", label="All Years")
-                ]
-            )
-        )
-        st.plotly_chart(fig_area, use_container_width=True)
-    
-    with st.expander("Show Bar Chart"):
+        fig_area.update_layout(margin=CHART_MARGIN)
+        return apply_time_axis(fig_area, rangeslider=False)
+
+    def build_bar_chart():
         df_bar = df.groupby(["year", "country_id"])["value"].mean().reset_index()
         fig_bar = px.bar(
             df_bar,
@@ -276,104 +287,30 @@ def show_sdg4_cross():
             y="value",
             color="country_id",
             barmode="group",
-            template="plotly_white",
+            template=CHART_TEMPLATE,
             labels={"year": "Year", "value": "Average Value", "country_id": "Country"},
             color_discrete_map=base_colors,
             height=700
         )
-        fig_bar.update_layout(margin=dict(l=60, r=60, t=40, b=80))
-        st.plotly_chart(fig_bar, use_container_width=True)
+        fig_bar.update_layout(margin=CHART_MARGIN)
+        return fig_bar
+
+    # The secondary charts are only built and sent once the user asks for them
+    if st.toggle("Show Area Chart", key="sdg4_cross_area"):
+        emit_chart(build_area_chart(), baseline_rangeslider=True)
+    else:
+        record_deferred_chart(build_area_chart, baseline_rangeslider=True)
+
+    if st.toggle("Show Bar Chart", key="sdg4_cross_bar"):
+        emit_chart(build_bar_chart())
+    else:
+        record_deferred_chart(build_bar_chart)
     
     
 
 # =============================================================================
 # OPRI DASHBOARD FUNCTIONS 
 # =============================================================================
-@st.cache_data
-def load_data_opri():
-    # Read the CSV files back into DataFrames
-    other_data_part1 = pd.read_csv("OPRI_NATIONAL_1.csv")
-    other_data_part2 = pd.read_csv("OPRI_NATIONAL_2.csv")
-    other_data_part3 = pd.read_csv("OPRI_NATIONAL_3.csv")
-    other_data_part4 = pd.read_csv("OPRI_NATIONAL_4.csv")
-    other_data_part5 = pd.read_csv("OPRI_NATIONAL_5.csv")
-
-    # Combine the DataFrames to restore the original dataset
-    other_data = pd.concat([other_data_part1, other_data_part2, other_data_part3, other_data_part4, other_data_part5], ignore_index=True)
-    other_label = pd.read_csv('OPRI_LABEL.csv')
-    
-    subset_codes = ['NPL', 'USA', 'SLE', 'EST']
-    other_uis = other_data[other_data['country_id'].isin(subset_codes)]
-    
-    other_uis['indicator_id'] = other_uis['indicator_id'].astype(str)
-    other_uis.rename(columns={'indicator_id': 'INDICATOR_ID'}, inplace=True)
-    
-    label_other_data = pd.merge(other_uis, other_label, on="INDICATOR_ID", how="left")
-    
-    filtered_data = label_other_data[~label_other_data['INDICATOR_LABEL_EN'].str.contains('tertiary', case=False, na=False)]
-    
-    regions = ['Africa:', 'Asia:', 'Caribbean and Central America:', 'Europe:', 'North America:', 'Oceania:', 'South America']
-    keep_list = [
-        'Africa: Students from Sierra Leone, both sexes (number)',
-        'Asia: Students from Nepal, both sexes (number)',
-        'Europe: Students from Estonia, both sexes (number)',
-        'North America: Students from the United States, both sexes (number)'
-    ]
-    mask_region = filtered_data['INDICATOR_LABEL_EN'].str.startswith(tuple(regions))
-    mask_keep = filtered_data['INDICATOR_LABEL_EN'].isin(keep_list)
-    filtered_data = filtered_data[~mask_region | mask_keep]
-    
-    zero_ratio = filtered_data.groupby('INDICATOR_ID')['value'].apply(lambda x: (x == 0).mean())
-    indicators_to_keep = zero_ratio[zero_ratio <= 0.7].index
-    filtered_data_df = filtered_data[filtered_data['INDICATOR_ID'].isin(indicators_to_keep)]
-    
-    def assign_category(indicator):
-        s = indicator.lower().strip()
-        if "teaching staff compensation" in s:
-            return "Expenditure"
-        if "expenditure" in s:
-            return "Expenditure"
-        if "enrol" in s:
-            return "Enrollment"
-        if "attendance" in s:
-            return "Attendance"
-        if "duration" in s:
-            return "Duration"
-        if "mean years of schooling" in s:
-            return "Duration"
-        if "official entrance" in s:
-            return "Duration"
-        if "illiterate" in s or "illiteracy" in s:
-            return "Illiteracy"
-        if "mobile" in s or "mobility" in s or "net flow" in s:
-            return "Mobility"
-        if 'students from' in s:
-            return "Mobility"
-        if "out-of-school" in s:
-            return "Out-of-School"
-        if "teacher" in s:
-            return "Teachers"
-        if "repeat" in s or "repetition" in s:
-            return "Repetition"
-        if "survival" in s:
-            return "Survival rates"
-        if "school age population" in s or "school life expectancy" in s or 'compulsory school age' in s:
-            return "General School Characteristics"
-        return "Uncategorized"
-    
-    filtered_data_df['CATEGORY'] = filtered_data_df['INDICATOR_LABEL_EN'].apply(assign_category)
-    return filtered_data_df
-
-opri_data = load_data_opri()
-
-@st.cache_data
-def get_country_indicators_opri(country_code):
-    data = load_data_opri()
-    df = data[data['country_id'] == country_code]
-    unique_indicators = df[['INDICATOR_ID', 'INDICATOR_LABEL_EN', 'CATEGORY']].drop_duplicates().sort_values('INDICATOR_ID')
-    indicator_dict = dict(zip(unique_indicators['INDICATOR_ID'], unique_indicators['INDICATOR_LABEL_EN']))
-    return unique_indicators, indicator_dict
-
 category_base_colors_opri = {
     "Expenditure": "#d62728",
     "Enrollment": "#1f77b4",
@@ -390,7 +327,9 @@ category_base_colors_opri = {
 }
 
 def create_individual_chart_multi_opri(country_code):                                           # custom dash/marker logic
-    data = load_data_opri()
+    data = wait_for_dataset("opri")
+    if data is None:
+        return None
     country_df = data[data['country_id'] == country_code]
     available_categories = sorted(country_df['CATEGORY'].unique())
     selected_categories = st.sidebar.multiselect("Select Category(s)", options=available_categories, default=[])
@@ -409,6 +348,7 @@ def create_individual_chart_multi_opri(country_code):
     if not selected_indicators:
         st.sidebar.info("Please select at least one indicator.")
         return None
+    overlays = select_trend_overlays()
     graph_df = df_cat[df_cat['INDICATOR_ID'].isin(selected_indicators)].sort_values('year')
     unique_labels = graph_df['INDICATOR_LABEL_EN'].unique()
     y_label = unique_labels[0] if len(unique_labels) == 1 else 'Value'
@@ -429,8 +369,7 @@ def create_individual_chart_multi_opri(country_code):
             dash_map[ind] = dash_styles[i % len(dash_styles)]
             marker_map[ind] = marker_symbols[i % len(marker_symbols)]
     
-    country_map = {"NPL": "Nepal", "USA": "USA", "EST": "Estonia", "SLE": "Sierra Leone"}
-    c_name = country_map.get(country_code, "")
+    c_name = COUNTRY_NAMES.get(country_code, "")
     
     fig = px.line(
         graph_df,
@@ -440,20 +379,20 @@ def create_individual_chart_multi_opri(country_code):
         color_discrete_map=indicator_color_map,
         markers=True,
         title=f'Individual Analysis for Country: {c_name}',
-        labels={'year': 'Year', 'value': y_label, 'INDICATOR_LABEL_EN': 'Indicator'},
-        hover_data={'INDICATOR_LABEL_EN': True},
-        template='plotly_white'
-    )
-    fig.update_traces(
-        hovertemplate='Indicator: %{customdata[0]}<br>Year: %{x}<br>Value: %{y}<extra></extra>',
-        customdata=graph_df[['INDICATOR_LABEL_EN']].values
+        labels={'year': 'Year', 'value': y_label},
+        template=CHART_TEMPLATE
     )
     for trace in fig.data:
         ind = trace.name
+        trace.hovertemplate = f'Indicator: {indicator_dict.get(ind, ind)}<br>Year: %{{x}}<br>Value: %{{y}}<extra></extra>'
         if ind in dash_map:
             trace.line.dash = dash_map[ind]
             trace.marker.symbol = marker_map[ind]
             trace.line.width = 3
+    if overlays:
+        analytics = load_timeseries_analytics("opri", dataset_version(OPRI_FILES))
+        analytics = analytics[(analytics['country_id'] == country_code) & analytics['INDICATOR_ID'].isin(selected_indicators)]
+        add_trend_overlays(fig, analytics, 'INDICATOR_ID', overlays)
     fig.update_layout(
         width=1100,
         height=900,
@@ -463,7 +402,9 @@ def create_individual_chart_multi_opri(country_code):
     return fig
 
 def create_cross_country_chart_multi_opri():
-    data = load_data_opri()
+    data = wait_for_dataset("opri")
+    if data is None:
+        return None
     available_categories = sorted(data['CATEGORY'].unique())
     selected_categories = st.sidebar.multiselect("Select Category(s)", options=available_categories, default=[])
     if not selected_categories:
@@ -477,40 +418,13 @@ def create_cross_country_chart_multi_opri():
         options=list(indicator_dict.keys()),
         format_func=lambda x: f"{x} - {indicator_dict[x]}"
     )
+    overlays = select_trend_overlays()
     graph_df = df_cat[df_cat['INDICATOR_ID'] == selected_indicator].sort_values('year')
-    unique_labels = graph_df['INDICATOR_LABEL_EN'].unique()
-    y_label = unique_labels[0] if len(unique_labels) == 1 else 'Value'
-    
-    fig = px.line(
-        graph_df,
-        x='year',
-        y='value',
-        color='country_id',
-        markers=True,
-        title="Cross-Country Analysis",
-        labels={'year': 'Year', 'value': y_label, 'country_id': 'Country', 'INDICATOR_LABEL_EN': 'Indicator'},
-        hover_data={'INDICATOR_LABEL_EN': True},
-        template='plotly_white',
-        height=700
-    )
-    fig.update_layout(
-        width=1100,
-        height=900,
-        paper_bgcolor='white',
-        plot_bgcolor='white',
-        margin=dict(l=60, r=60, t=40, b=80)
-    )
-    fig.update_xaxes(
-        rangeslider_visible=True,
-        rangeselector=dict(
-            buttons=[
-                dict(count=5, label='Last 5 Years', step='year', stepmode='backward'),
-                dict(count=10, label='Last 10 Years', step='year', stepmode='backward'),
-                dict(step='all', label='All Years')
-            ]
-        )
-    )
-    return fig
+    analytics = None
+    if overlays:
+        analytics = load_timeseries_analytics("opri", dataset_version(OPRI_FILES))
+        analytics = analytics[analytics['INDICATOR_ID'] == selected_indicator]
+    return build_opri_cross_country_chart(graph_df, indicator_dict[selected_indicator], overlays, analytics)
 
 def show_individual_opri():
     st.title(":green[Other Policy Indicators -> Individual Analysis]")
@@ -529,34 +443,38 @@ def opri_show_nepal():
     st.subheader("Nepal Analysis")
     fig = create_individual_chart_multi_opri('NPL')
     if fig is not None:
-        st.plotly_chart(fig, use_container_width=True)
+        emit_chart(fig)
 
 def opri_show_usa():
     st.subheader("USA Analysis")
     fig = create_individual_chart_multi_opri('USA')
     if fig is not None:
-        st.plotly_chart(fig, use_container_width=True)
+        emit_chart(fig)
 
 def opri_show_est():
     st.subheader("Estonia Analysis")
     fig = create_individual_chart_multi_opri('EST')
     if fig is not None:
-        st.plotly_chart(fig, use_container_width=True)
+        emit_chart(fig)
 
 def opri_show_sle():
     st.subheader("Sierra Leone Analysis")
     fig = create_individual_chart_multi_opri('SLE')
     if fig is not None:
-        st.plotly_chart(fig, use_container_width=True)
+        emit_chart(fig)
 
 def show_cross_opri():
     st.title(":green[Other Policy Indicators -> Cross-country Analysis]")
     fig = create_cross_country_chart_multi_opri()
     if fig is not None:
-        st.plotly_chart(fig, use_container_width=True)
+        emit_chart(fig)
     st.markdown("**SOURCE**: [OPRI (Other Policy related indicators)](https://databrowser.uis.unesco.org/browser/EDUCATION/UIS-EducationOPRI)")
 
 
+# Start every loader as soon as the server first runs the script
+start_all_dataset_loads()
+
+
 # =============================================================================
 # SIDEBAR NAVIGATION FOR UIS INDICATORS
 # =============================================================================
@@ -611,6 +529,7 @@ def main():
             show_individual_opri()
         elif st.session_state.analysis == "Cross-country Analysis":
             show_cross_opri()
+    show_payload_summary()
 
 
 if __name__ == "__main__":
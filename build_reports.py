@@ -0,0 +1,140 @@
+import argparse
+import html
+import os
+import posixpath
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from plotly.offline import get_plotlyjs
+
+from uis_charts import build_opri_cross_country_chart, build_parameter_chart, build_sdg4_line_chart, compact_figure
+from uis_data import COUNTRY_NAMES, load_data_opri, load_data_sdg4, load_parameter_data
+
+# =============================================================================
+# BATCH STATIC REPORTS
+# Renders every SDG4 (country x indicator), OPRI (category x indicator, all
+# countries) and National Parameters (country x parameter) chart to HTML:
+#     python build_reports.py --out reports --workers 8
+# =============================================================================
+PLOTLY_BUNDLE = "plotly.min.js"
+
+SECTIONS = {
+    "sdg4": ("SDG-4 Indicators", ['country_id', 'INDICATOR_ID']),
+    "opri": ("Other Policy Indicators (OPRI)", ['CATEGORY', 'INDICATOR_ID']),
+    "parameters": ("National Parameters", ['Country', 'Parameter']),
+}
+
+# Per-worker lookup of (group, key) -> rows, built once by the pool initializer
+_groups = {}
+
+def _init_worker(datasets):
+    for section, data in datasets.items():
+        _groups[section] = dict(tuple(data.groupby(SECTIONS[section][1], sort=False, observed=True)))
+
+def _slug(text):
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(text)).strip('_')
+
+def _first(values, default):
+    values = values.dropna().unique()
+    return values[0] if len(values) > 0 else default
+
+def load_datasets():
+    # A dataset whose files are missing is skipped, not fatal, as in the dashboards
+    loaders = {"sdg4": load_data_sdg4, "opri": load_data_opri, "parameters": load_parameter_data}
+    datasets = {}
+    for section, loader in loaders.items():
+        try:
+            datasets[section] = loader()
+        except Exception as exc:
+            print(f"Skipping {SECTIONS[section][0]}: {exc}", file=sys.stderr)
+    return datasets
+
+def list_jobs(datasets):
+    jobs = []
+    for section, data in datasets.items():
+        keys = data[SECTIONS[section][1]].drop_duplicates().sort_values(SECTIONS[section][1])
+        jobs.extend((section, group, key) for group, key in keys.itertuples(index=False))
+    return jobs
+
+def render_chart(job, out_dir):
+    section, group, key = job
+    frame = _groups[section][(group, key)]
+    if section == "sdg4":
+        label = _first(frame['INDICATOR_LABEL_EN'], key)
+        title = f"{key} - {label}"
+        fig = build_sdg4_line_chart(frame.drop_duplicates(), {key: label},
+                                    title=f"{COUNTRY_NAMES.get(group, group)}: {title}")
+    elif section == "opri":
+        label = _first(frame['INDICATOR_LABEL_EN'], key)
+        title = f"{key} - {label}"
+        fig = build_opri_cross_country_chart(frame.sort_values('year'), label, title=title)
+    else:
+        levels = sorted(frame["Level"].dropna().unique())
+        kinds = sorted(frame["Kind"].dropna().unique())
+        title = key
+        fig = build_parameter_chart(frame, f"{group} - {key}", _first(frame["Y-axis"], "Value"),
+                                    levels, levels, kinds)
+
+    relpath = posixpath.join(section, _slug(group), f"{_slug(key)}.html")
+    path = os.path.join(out_dir, *relpath.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Every report points at the one plotly.js bundle written next to index.html
+    bundle = posixpath.relpath(PLOTLY_BUNDLE, posixpath.dirname(relpath))
+    compact_figure(fig).write_html(path, include_plotlyjs=bundle, full_html=True)
+    return section, group, title, relpath
+
+def write_index(out_dir, results, elapsed):
+    by_section = {}
+    for section, group, title, relpath in results:
+        by_section.setdefault(section, {}).setdefault(group, []).append((title, relpath))
+
+    parts = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset='utf-8'><title>UIS Indicator Reports</title></head><body>",
+        "<h1>UIS Indicator Reports</h1>",
+        f"<p>{len(results)} charts rendered in {elapsed:.1f}s ({len(results) / elapsed:.1f} charts/s).</p>",
+    ]
+    for section, groups in by_section.items():
+        parts.append(f"<h2>{html.escape(SECTIONS[section][0])}</h2>")
+        for group, charts in groups.items():
+            parts.append(f"<h3>{html.escape(str(COUNTRY_NAMES.get(group, group)))}</h3><ul>")
+            parts.extend(f"<li><a href='{html.escape(relpath)}'>{html.escape(str(title))}</a></li>"
+                         for title, relpath in charts)
+            parts.append("</ul>")
+    parts.append("</body></html>")
+
+    index_path = os.path.join(out_dir, "index.html")
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+    return index_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render every SDG4, OPRI and National Parameters chart to static HTML.")
+    parser.add_argument("--out", default="reports", help="output directory (default: reports)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    datasets = load_datasets()
+    jobs = list_jobs(datasets)
+    if not jobs:
+        parser.error("no dataset could be loaded")
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, PLOTLY_BUNDLE), "w", encoding="utf-8") as f:
+        f.write(get_plotlyjs())
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(datasets,)) as pool:
+        chunksize = max(1, len(jobs) // (4 * args.workers))
+        results = list(pool.map(partial(render_chart, out_dir=args.out), jobs, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    index_path = write_index(args.out, results, elapsed)
+    print(f"Rendered {len(results)} charts in {elapsed:.1f}s ({len(results) / elapsed:.1f} charts/s) -> {index_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
+
+from uis_charts import build_parameter_chart, compact_figure
+from uis_loading import start_all_dataset_loads, wait_for_dataset
 
 st.set_page_config(layout="wide")
 
@@ -26,18 +27,15 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-file_path = "ParameterDataset.xlsx"
-df = pd.read_excel(file_path, sheet_name="Table", engine="openpyxl")
-
-# Data cleanup
-df["Year"] = pd.to_numeric(df["Year"], errors="coerce")  # Convert to numeric, forcing non-numeric to NaN
-df = df.dropna(subset=["Year", "Value", "Country", "Parameter", "Level", "Kind"])  # Drop rows with NaN in critical columns
-df["Year"] = df["Year"].astype(int)  # Convert "Year" to integers
-df["Value"] = pd.to_numeric(df["Value"], errors="coerce")
+start_all_dataset_loads()
 
 # Streamlit app
 st.title("Country-wise Parameter Visualization")
 
+df = wait_for_dataset("parameters")
+if df is None:
+    st.stop()
+
 # Sidebar filter for country
 countries = sorted(df["Country"].unique())
 selected_country = st.sidebar.selectbox("Select Country", countries)
@@ -60,7 +58,6 @@ filtered_df = country_df[country_df["Parameter"].isin(selected_parameters)]
 
 # Loop through each parameter and create separate plots
 for selected_parameter in selected_parameters:
-    fig = go.Figure()
     parameter_df = filtered_df[filtered_df["Parameter"] == selected_parameter]
 
     source = parameter_df["Source"].dropna().unique()
@@ -88,50 +85,13 @@ for selected_parameter in selected_parameters:
         selected_kinds = st.multiselect(f"Select Kind for {selected_parameter}", kinds, default=[])
 
     
-    for selected_level in selected_levels:
-        level_df = parameter_df[parameter_df["Level"] == selected_level]
-        
-        for kind in selected_kinds:
-            kind_df = level_df[level_df["Kind"] == kind]
-            if not kind_df.empty:
-            
-                if selected_level == "-" and kind == "-":
-                    name = ""
-                elif selected_level == "-":
-                    name = f"{kind}"
-                elif kind == "-":
-                    name = f"{selected_level}"
-                else:
-                    name = f"{selected_level} - {kind}"
-                
-                line_styles = ['solid', 'dash', 'dot', 'dashdot']
-                line_style = line_styles[levels.index(selected_level) % len(line_styles)]
-                
-                trace = go.Scatter(
-                    x=kind_df["Year"], 
-                    y=kind_df["Value"], 
-                    mode='lines+markers', 
-                    name=name,
-                    line=dict(width=2, dash=line_style),
-                    marker=dict(size=6)
-                )
-                fig.add_trace(trace)
-
-        fig.update_layout(
-            title=f"{selected_country} - {selected_parameter}",
-            xaxis_title="Year",
-            yaxis_title=y_axis_title,
-            template="plotly",
-            showlegend=True,
-            hovermode="x unified",
-            margin=dict(t=50, b=50, l=50, r=50),
-            font=dict(family="Arial", size=12, color="black")
-        )
+    fig = build_parameter_chart(parameter_df, f"{selected_country} - {selected_parameter}", y_axis_title,
+                                levels, selected_levels, selected_kinds)
 
     # Plot graph with unique key
     if not parameter_df.empty:
         unique_key = f"{selected_country}_{selected_parameter}_{'_'.join(selected_levels)}_{'_'.join(selected_kinds)}"
-        st.plotly_chart(fig, key=unique_key)
+        st.plotly_chart(compact_figure(fig), key=unique_key)
 
     # Get all unique sources and their corresponding years
     unique_sources = parameter_df[["Year", "Source", "Source name"]].dropna().drop_duplicates()
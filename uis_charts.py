@@ -0,0 +1,223 @@
+import numpy as np
+import plotly.express as px
+import plotly.colors as pc
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from uis_data import ROLLING_WINDOW
+
+# =============================================================================
+# SHARED TEMPLATE & PAYLOAD HELPERS
+# =============================================================================
+# float32 is only used when every value survives it within both tolerances; the
+# values themselves are never rounded
+FLOAT32_ABS_TOLERANCE = 0.5e-4  # keeps 4 displayed decimals intact (large counts stay float64)
+FLOAT32_REL_TOLERANCE = 1e-6    # keeps tiny values' significant digits (no underflow to 0)
+
+# Slim stand-in for "plotly_white": only the layout keys our charts use, instead of
+# the full template (~6.5 KB) that plotly embeds in every serialized figure
+_axis_style = dict(gridcolor="#EBF0F8", linecolor="#EBF0F8", zerolinecolor="#EBF0F8",
+                   zerolinewidth=2, ticks="", automargin=True, title=dict(standoff=15))
+pio.templates["uis_white"] = go.layout.Template(layout=dict(
+    colorway=pc.qualitative.Plotly,
+    font=dict(color="#2a3f5f"),
+    hoverlabel=dict(align="left"),
+    hovermode="closest",
+    paper_bgcolor="white",
+    plot_bgcolor="white",
+    title=dict(x=0.05),
+    xaxis=_axis_style,
+    yaxis=_axis_style
+))
+CHART_TEMPLATE = "uis_white"
+CHART_MARGIN = dict(l=60, r=60, t=40, b=80)
+
+RANGE_SELECTOR = dict(
+    buttons=[
+        dict(count=5, label='Last 5 Years', step='year', stepmode='backward'),
+        dict(count=10, label='Last 10 Years', step='year', stepmode='backward'),
+        dict(step='all', label='All Years')
+    ]
+)
+
+def apply_time_axis(fig, rangeslider=True):
+    fig.update_xaxes(rangeslider_visible=rangeslider, rangeselector=RANGE_SELECTOR)
+    return fig
+
+def _compact_array(values):
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'iu':
+        for dtype in (np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if arr.size == 0 or (arr.min() >= info.min and arr.max() <= info.max):
+                return arr.astype(dtype)
+        return arr
+    if arr.dtype.kind == 'f':
+        with np.errstate(over='ignore'):
+            narrowed = arr.astype(np.float32)
+        error = np.abs(narrowed.astype(np.float64) - arr)
+        within = (error <= FLOAT32_ABS_TOLERANCE) & (error <= FLOAT32_REL_TOLERANCE * np.abs(arr))
+        if np.all(np.isnan(arr) | within):
+            return narrowed
+        return arr
+    return values
+
+def compact_figure(fig):
+    # Numeric numpy arrays are serialized by plotly as base64 typed arrays; narrowing
+    # them (int16 years, float32 where that round-trips the values) shrinks every trace
+    for trace in fig.data:
+        for attr in ('x', 'y'):
+            values = getattr(trace, attr, None)
+            if values is not None:
+                setattr(trace, attr, _compact_array(values))
+    return fig
+
+
+# =============================================================================
+# TREND OVERLAYS
+# =============================================================================
+ROLLING_LABEL = f"Rolling mean ({ROLLING_WINDOW} years)"
+TREND_OVERLAYS = ["Interpolated gaps", ROLLING_LABEL, "YoY change (%)"]
+
+def add_trend_overlays(fig, analytics, series_col, overlays):
+    if not overlays:
+        return fig
+    colors = {trace.name: trace.line.color for trace in fig.data}
+    subset = analytics[analytics[series_col].isin(list(colors))]
+    for name, series_df in subset.groupby(series_col, sort=False, observed=True):
+        color = colors[name]
+        if "Interpolated gaps" in overlays:
+            gaps = series_df[series_df['is_interpolated']]
+            fig.add_trace(go.Scatter(
+                x=gaps['year'], y=gaps['value_interp'], mode='markers',
+                name=f"{name} (interpolated)", legendgroup=name,
+                marker=dict(color=color, size=9, symbol='circle-open', line=dict(width=2)),
+                hovertemplate='Interpolated<br>Year: %{x}<br>Value: %{y:.2f}<extra></extra>'
+            ))
+        if ROLLING_LABEL in overlays:
+            fig.add_trace(go.Scatter(
+                x=series_df['year'], y=series_df['value_rolling'], mode='lines',
+                name=f"{name} (rolling mean)", legendgroup=name,
+                line=dict(color=color, width=2, dash='dot'),
+                hovertemplate=f'{ROLLING_LABEL}<br>Year: %{{x}}<br>Value: %{{y:.2f}}<extra></extra>'
+            ))
+        if "YoY change (%)" in overlays:
+            fig.add_trace(go.Scatter(
+                x=series_df['year'], y=series_df['yoy_pct'], mode='lines',
+                name=f"{name} (YoY %)", legendgroup=name, yaxis='y2', opacity=0.6,
+                line=dict(color=color, width=1.5, dash='dashdot'),
+                hovertemplate='YoY change<br>Year: %{x}<br>Change: %{y:.1f}%<extra></extra>'
+            ))
+    if "YoY change (%)" in overlays:
+        fig.update_layout(
+            yaxis2=dict(title='YoY change (%)', overlaying='y', side='right', showgrid=False, zeroline=True)
+        )
+    return fig
+
+
+# =============================================================================
+# FIGURE BUILDERS (no widgets; used by the dashboards and the batch reports)
+# =============================================================================
+def build_sdg4_line_chart(df, indicator_labels, overlays=(), analytics=None, title=None):
+    # `df` holds one country's rows for the indicators to draw
+    base_colors = pc.qualitative.Plotly
+    indicator_color_map = {ind: base_colors[i % len(base_colors)]
+                           for i, ind in enumerate(sorted(df['INDICATOR_ID'].unique()))}
+    
+    fig = px.line(
+        df,
+        x='year',
+        y='value',
+        color='INDICATOR_ID',
+        markers=True,
+        title=title,
+        template=CHART_TEMPLATE,
+        labels={'year': 'Year', 'value': 'Value'}
+    )
+    for trace in fig.data:
+        ind = trace.name
+        # Label baked into the trace's hovertemplate instead of repeated per point as customdata
+        trace.hovertemplate = f'<b>{indicator_labels.get(ind, ind)}</b><br>Year: %{{x}}<br>Value: %{{y}}<extra></extra>'
+        if ind in indicator_color_map:
+            trace.line.color = indicator_color_map[ind]
+            trace.line.width = 3
+    if overlays and analytics is not None:
+        add_trend_overlays(fig, analytics, 'INDICATOR_ID', overlays)
+    fig.update_layout(margin=CHART_MARGIN)
+    apply_time_axis(fig)
+    return fig
+
+def build_opri_cross_country_chart(graph_df, indicator_label, overlays=(), analytics=None, title="Cross-Country Analysis"):
+    # `graph_df` holds every country's rows for a single indicator, sorted by year
+    unique_labels = graph_df['INDICATOR_LABEL_EN'].unique()
+    y_label = unique_labels[0] if len(unique_labels) == 1 else 'Value'
+    
+    fig = px.line(
+        graph_df,
+        x='year',
+        y='value',
+        color='country_id',
+        markers=True,
+        title=title,
+        labels={'year': 'Year', 'value': y_label, 'country_id': 'Country'},
+        template=CHART_TEMPLATE,
+        height=700
+    )
+    for trace in fig.data:
+        trace.hovertemplate = (f'Country: {trace.name}<br>Indicator: {indicator_label}'
+                               '<br>Year: %{x}<br>Value: %{y}<extra></extra>')
+    if overlays and analytics is not None:
+        add_trend_overlays(fig, analytics, 'country_id', overlays)
+    fig.update_layout(
+        width=1100,
+        height=900,
+        paper_bgcolor='white',
+        plot_bgcolor='white',
+        margin=CHART_MARGIN
+    )
+    apply_time_axis(fig)
+    return fig
+
+def build_parameter_chart(parameter_df, title, y_axis_title, levels, selected_levels, selected_kinds):
+    # One trace per selected (level, kind) pair; "-" marks a parameter without levels/kinds
+    fig = go.Figure()
+    line_styles = ['solid', 'dash', 'dot', 'dashdot']
+    for selected_level in selected_levels:
+        level_df = parameter_df[parameter_df["Level"] == selected_level]
+        
+        for kind in selected_kinds:
+            kind_df = level_df[level_df["Kind"] == kind]
+            if not kind_df.empty:
+            
+                if selected_level == "-" and kind == "-":
+                    name = ""
+                elif selected_level == "-":
+                    name = f"{kind}"
+                elif kind == "-":
+                    name = f"{selected_level}"
+                else:
+                    name = f"{selected_level} - {kind}"
+                
+                line_style = line_styles[levels.index(selected_level) % len(line_styles)]
+                
+                trace = go.Scatter(
+                    x=kind_df["Year"], 
+                    y=kind_df["Value"], 
+                    mode='lines+markers', 
+                    name=name,
+                    line=dict(width=2, dash=line_style),
+                    marker=dict(size=6)
+                )
+                fig.add_trace(trace)
+
+    fig.update_layout(
+        title=title,
+        xaxis_title="Year",
+        yaxis_title=y_axis_title,
+        template=CHART_TEMPLATE,
+        showlegend=True,
+        hovermode="x unified",
+        margin=dict(t=50, b=50, l=50, r=50),
+        font=dict(family="Arial", size=12, color="black")
+    )
+    return fig
@@ -0,0 +1,212 @@
+import os
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# SOURCE FILES (shared by the dashboards and the batch report builder)
+# =============================================================================
+SDG4_FILES = ['UNESCO_edu_data.csv', 'SDG_METADATA.csv']
+OPRI_PART_FILES = [f"OPRI_NATIONAL_{i}.csv" for i in range(1, 6)]
+OPRI_FILES = OPRI_PART_FILES + ['OPRI_LABEL.csv']
+PARAMETER_FILE = "ParameterDataset.xlsx"
+
+COUNTRY_NAMES = {"NPL": "Nepal", "USA": "USA", "EST": "Estonia", "SLE": "Sierra Leone"}
+
+def dataset_version(paths):
+    # (path, mtime, size) of every source file; changes whenever a file is replaced
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            version.append((path, stat.st_mtime, stat.st_size))
+        except OSError:
+            version.append((path, None, None))
+    return tuple(version)
+
+
+# =============================================================================
+# INDICATOR DIMENSION
+# Fact tables keep one integer code per row; labels and other per-indicator
+# attributes live once in a small dimension table and are broadcast by code.
+# =============================================================================
+def _take(values, codes):
+    # values[codes], keeping -1 (missing) codes as -1
+    return np.where(codes >= 0, np.asarray(values)[codes], -1)
+
+def encode_indicators(ids, metadata, normalize=None):
+    # Returns (codes, indicators): one code per fact row, and the distinct ids in code
+    # order left-joined to `metadata`. `normalize` is applied to the distinct ids only.
+    codes, uniques = pd.factorize(ids, sort=True)
+    if normalize is not None:
+        norm_codes, uniques = pd.factorize(normalize(pd.Index(uniques)), sort=True)
+        codes = _take(norm_codes, codes)
+    indicators = pd.DataFrame({'INDICATOR_ID': uniques}).merge(
+        metadata.drop_duplicates('INDICATOR_ID'), on="INDICATOR_ID", how="left"
+    )
+    return codes, indicators
+
+def broadcast_indicator_column(codes, values):
+    # Expands a per-indicator column to the fact rows as a categorical
+    value_codes, uniques = pd.factorize(values, sort=True)
+    return pd.Categorical.from_codes(_take(value_codes, codes), uniques).remove_unused_categories()
+
+
+# =============================================================================
+# LOADERS
+# =============================================================================
+def load_data_sdg4(report=None):
+    report = report or (lambda fraction, text: None)
+    report(0.0, "Reading UNESCO_edu_data.csv")
+    data = pd.read_csv('UNESCO_edu_data.csv', usecols=lambda col: col != 'indicator_desc')
+    report(0.5, "Reading SDG_METADATA.csv")
+    metadata = pd.read_csv('SDG_METADATA.csv')
+    report(0.8, "Attaching indicator labels")
+    codes, indicators = encode_indicators(data.pop('indicator_id'), metadata,
+                                          normalize=lambda ids: ids.str.upper().str.strip())
+    data.insert(0, 'INDICATOR_ID', broadcast_indicator_column(codes, indicators['INDICATOR_ID']))
+    data['INDICATOR_LABEL_EN'] = broadcast_indicator_column(codes, indicators['INDICATOR_LABEL_EN'])
+    return data
+
+def load_data_opri(report=None):
+    report = report or (lambda fraction, text: None)
+    # Read the CSV files back into DataFrames
+    parts = []
+    for i, path in enumerate(OPRI_PART_FILES):
+        report(0.6 * i / len(OPRI_PART_FILES), f"Reading {path}")
+        parts.append(pd.read_csv(path))
+
+    # Combine the DataFrames to restore the original dataset
+    other_data = pd.concat(parts, ignore_index=True)
+    report(0.6, "Reading OPRI_LABEL.csv")
+    other_label = pd.read_csv('OPRI_LABEL.csv')
+    
+    subset_codes = ['NPL', 'USA', 'SLE', 'EST']
+    other_uis = other_data[other_data['country_id'].isin(subset_codes)]
+    codes, indicators = encode_indicators(other_uis.pop('indicator_id').astype(str), other_label)
+    # Rows without an indicator id get code -1; drop them before indexing by code
+    has_id = codes >= 0
+    codes = codes[has_id]
+    other_uis = other_uis[has_id]
+    
+    # Label filters run once per distinct indicator
+    labels = indicators['INDICATOR_LABEL_EN']
+    is_tertiary = labels.str.contains('tertiary', case=False, na=False)
+    
+    regions = ['Africa:', 'Asia:', 'Caribbean and Central America:', 'Europe:', 'North America:', 'Oceania:', 'South America']
+    keep_list = [
+        'Africa: Students from Sierra Leone, both sexes (number)',
+        'Asia: Students from Nepal, both sexes (number)',
+        'Europe: Students from Estonia, both sexes (number)',
+        'North America: Students from the United States, both sexes (number)'
+    ]
+    is_region = labels.str.startswith(tuple(regions), na=False)
+    keep_indicator = ~is_tertiary & (~is_region | labels.isin(keep_list))
+    
+    # Share of zero values per indicator, counted straight from the row codes
+    n_indicators = len(indicators)
+    row_counts = np.bincount(codes, minlength=n_indicators)
+    zero_counts = np.bincount(codes, weights=(other_uis['value'].to_numpy() == 0), minlength=n_indicators)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        zero_ratio = zero_counts / row_counts
+    keep_indicator = keep_indicator.to_numpy() & (zero_ratio <= 0.7)
+    
+    def assign_category(indicator):
+        s = indicator.lower().strip()
+        if "teaching staff compensation" in s:
+            return "Expenditure"
+        if "expenditure" in s:
+            return "Expenditure"
+        if "enrol" in s:
+            return "Enrollment"
+        if "attendance" in s:
+            return "Attendance"
+        if "duration" in s:
+            return "Duration"
+        if "mean years of schooling" in s:
+            return "Duration"
+        if "official entrance" in s:
+            return "Duration"
+        if "illiterate" in s or "illiteracy" in s:
+            return "Illiteracy"
+        if "mobile" in s or "mobility" in s or "net flow" in s:
+            return "Mobility"
+        if 'students from' in s:
+            return "Mobility"
+        if "out-of-school" in s:
+            return "Out-of-School"
+        if "teacher" in s:
+            return "Teachers"
+        if "repeat" in s or "repetition" in s:
+            return "Repetition"
+        if "survival" in s:
+            return "Survival rates"
+        if "school age population" in s or "school life expectancy" in s or 'compulsory school age' in s:
+            return "General School Characteristics"
+        return "Uncategorized"
+    
+    report(0.9, "Categorising indicators")
+    indicators['CATEGORY'] = labels.map(assign_category, na_action='ignore').fillna("Uncategorized")
+    
+    keep_rows = keep_indicator[codes]
+    codes = codes[keep_rows]
+    filtered_data_df = other_uis[keep_rows]
+    filtered_data_df.insert(0, 'INDICATOR_ID', broadcast_indicator_column(codes, indicators['INDICATOR_ID']))
+    filtered_data_df['INDICATOR_LABEL_EN'] = broadcast_indicator_column(codes, labels)
+    filtered_data_df['CATEGORY'] = broadcast_indicator_column(codes, indicators['CATEGORY'])
+    return filtered_data_df
+
+def load_parameter_data(file_path=PARAMETER_FILE, report=None):
+    report = report or (lambda fraction, text: None)
+    report(0.0, f"Reading {file_path}")
+    df = pd.read_excel(file_path, sheet_name="Table", engine="openpyxl")
+    report(0.8, "Cleaning parameter rows")
+
+    # Data cleanup
+    df["Year"] = pd.to_numeric(df["Year"], errors="coerce")  # Convert to numeric, forcing non-numeric to NaN
+    df = df.dropna(subset=["Year", "Value", "Country", "Parameter", "Level", "Kind"])  # Drop rows with NaN in critical columns
+    df["Year"] = df["Year"].astype(int)  # Convert "Year" to integers
+    df["Value"] = pd.to_numeric(df["Value"], errors="coerce")
+    return df
+
+
+# =============================================================================
+# TIME-SERIES ANALYTICS
+# =============================================================================
+ROLLING_WINDOW = 3
+# Longest distance (in years) between two observations that is still bridged by interpolation
+MAX_GAP_YEARS = 3
+
+def compute_timeseries_analytics(data, keys, window=ROLLING_WINDOW, max_gap=MAX_GAP_YEARS):
+    # Yearly mean per series, with only observed values kept
+    series = data.dropna(subset=['value']).groupby(keys + ['year'], as_index=False, observed=True)['value'].mean()
+
+    # Complete year grid from first to last observed year of every series
+    bounds = series.groupby(keys, observed=True)['year'].agg(['min', 'max']).reset_index()
+    lengths = (bounds['max'] - bounds['min'] + 1).to_numpy()
+    frame = bounds.loc[bounds.index.repeat(lengths), keys].reset_index(drop=True)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    frame['year'] = (np.repeat(bounds['min'].to_numpy(), lengths) + offsets).astype(series['year'].dtype)
+    frame = frame.merge(series, on=keys + ['year'], how='left')
+
+    # Linear interpolation between the surrounding observed years of the same series
+    group = frame.groupby(keys, sort=False, observed=True).ngroup()
+    observed = pd.DataFrame({
+        'value': frame['value'],
+        'year': frame['year'].where(frame['value'].notna()),
+    })
+    prev_obs = observed.groupby(group).ffill()
+    next_obs = observed.groupby(group).bfill()
+    span = next_obs['year'] - prev_obs['year']
+    weight = ((frame['year'] - prev_obs['year']) / span).fillna(0)
+    # Gaps longer than `max_gap` years stay empty rather than becoming a straight-line guess
+    frame['value_interp'] = (prev_obs['value'] + (next_obs['value'] - prev_obs['value']) * weight).where(span <= max_gap)
+    frame['is_interpolated'] = frame['value'].isna() & frame['value_interp'].notna()
+
+    # Rolling mean and year-over-year change on the gap-free series
+    interp_by_group = frame['value_interp'].groupby(group)
+    rolling = interp_by_group.rolling(window, min_periods=1).mean().droplevel(0)
+    frame['value_rolling'] = rolling.where(frame['value_interp'].notna())
+    previous = interp_by_group.shift()
+    frame['yoy_change'] = frame['value_interp'] - previous
+    frame['yoy_pct'] = (frame['yoy_change'] / previous.abs() * 100).replace([np.inf, -np.inf], np.nan)
+    return frame
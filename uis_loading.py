@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from uis_data import (OPRI_FILES, PARAMETER_FILE, SDG4_FILES, dataset_version, load_data_opri, load_data_sdg4,
+                      load_parameter_data)
+
+# =============================================================================
+# BACKGROUND DATA LOADING (shared by the dashboards and the National Parameters page)
+# =============================================================================
+DATASETS = {
+    "sdg4": dict(title="SDG4 indicators", files=SDG4_FILES, loader=load_data_sdg4),
+    "opri": dict(title="OPRI indicators", files=OPRI_FILES, loader=load_data_opri),
+    "parameters": dict(title="National Parameters", files=[PARAMETER_FILE], loader=load_parameter_data),
+}
+
+@st.cache_resource
+def loader_executor():
+    return ThreadPoolExecutor(max_workers=len(DATASETS), thread_name_prefix="uis-loader")
+
+@st.cache_resource(max_entries=2 * len(DATASETS))
+def start_dataset_load(name, version):
+    # Shared by every session; keyed by the source files' version, so replacing or
+    # adding a file (e.g. a missing OPRI part) starts a fresh load on the next run
+    progress = {"fraction": 0.0, "text": "Queued"}
+    def report(fraction, text):
+        progress.update(fraction=fraction, text=text)
+    future = loader_executor().submit(DATASETS[name]["loader"], report=report)
+    return future, progress
+
+def dataset_load(name):
+    return start_dataset_load(name, dataset_version(DATASETS[name]["files"]))
+
+def start_all_dataset_loads():
+    # Called on every run of either script, so whichever page a session opens first
+    # warms every dataset
+    for name in DATASETS:
+        dataset_load(name)
+
+def wait_for_dataset(name):
+    # Shows a progress placeholder until the dataset arrives; returns None (after
+    # showing the error) if its loader failed, so only the views needing it are affected
+    future, progress = dataset_load(name)
+    title = DATASETS[name]["title"]
+    if not future.done():
+        placeholder = st.empty()
+        while not future.done():
+            placeholder.progress(progress["fraction"], text=f"Loading {title}: {progress['text']}...")
+            time.sleep(0.2)
+        placeholder.empty()
+    error = future.exception()
+    if error is not None:
+        st.error(f"{title} could not be loaded: {error}")
+        return None
+    return future.result()